@@ -0,0 +1,366 @@
+"""
+Single-pass AST checker for RefactorIQ.
+
+Kept in its own module with full type annotations so it can optionally be
+compiled ahead-of-time with mypyc (see setup.py); the Flask app imports it
+the same way whether the compiled extension or the plain module is used.
+"""
+
+import ast
+from dataclasses import dataclass
+from sys import intern as _intern
+from typing import ClassVar, Union
+
+# Configuration
+MAX_FUNCTION_LINES = 50  # Threshold for long functions
+MAX_NESTING_DEPTH = 4    # Threshold for deep nesting
+
+# Statements that make anything after them in the same block unreachable.
+# Exact-type membership in a frozenset is an O(1) hash probe, cheaper than
+# isinstance against a 4-type tuple rebuilt at every call site.
+_TERM_TYPES = frozenset({ast.Return, ast.Raise, ast.Break, ast.Continue})
+
+# Comparison op names that make `x <op> x` a constant-result comparison
+_SELF_CMP_OPS = ('Eq', 'NotEq')
+
+# Shared, interned label constants. Every finding reuses these single
+# instances, so issue construction never materializes new label strings
+# and downstream dict/set lookups compare by identity first.
+_T_BEST_PRACTICE = _intern('Best Practice')
+_T_LONG_FUNCTION = _intern('Long Function')
+_T_LOGICAL_ERROR = _intern('Logical Error')
+_T_DEEP_NESTING = _intern('Deep Nesting')
+_T_UNREACHABLE = _intern('Unreachable Code')
+_SEV_INFO = _intern('info')
+_SEV_WARNING = _intern('warning')
+_SEV_ERROR = _intern('error')
+
+# Fixed suggestion/description texts hoisted alongside the labels; the
+# per-finding f-string messages stay inline since they embed line numbers
+# and names, but these literals never vary between findings
+_S_FIX_CONDITION = 'Remove the if statement or fix the condition.'
+_S_FIX_SELF_CMP = 'Fix the comparison to compare with a different variable or value.'
+_S_USE_ENUMERATE = 'Use enumerate() or iterate directly over items instead of range(len()).'
+_S_SPLIT_FUNCTION = 'Split this function into smaller, simpler functions that each do one thing.'
+_S_REDUCE_NESTING = 'Use early returns or move nested code into separate functions to make it simpler.'
+_S_REMOVE_UNREACHABLE = 'Remove unreachable code or restructure your logic to make it reachable.'
+_D_EXTRACT_FUNCTION = 'Break this function into smaller pieces. Each function should do one specific task.'
+_D_REDUCE_NESTING = 'Simplify nested code by returning early when possible or creating helper functions.'
+
+
+def _iter_nodes(root: ast.AST):
+    """
+    Iterative depth-first iteration over a subtree.
+
+    Yields the same node set as ast.walk but drives the traversal with a
+    plain list stack and reads _fields directly, skipping the
+    deque.popleft and per-node iter_child_nodes generator overhead.
+    """
+    stack = [root]
+    pop = stack.pop
+    while stack:
+        node = pop()
+        yield node
+        for name in node._fields:
+            value = getattr(node, name, None)
+            if isinstance(value, list):
+                stack.extend(v for v in value if isinstance(v, ast.AST))
+            elif isinstance(value, ast.AST):
+                stack.append(value)
+
+
+@dataclass(slots=True)
+class Issue:
+    """
+    One analysis finding.
+
+    A slotted dataclass instead of a per-finding dict: no instance
+    __dict__, so hundreds of findings cost a fraction of the memory, and
+    both orjson and Flask's default JSON provider serialize dataclasses
+    to the same {type, severity, message, line, suggestion} shape the
+    API has always returned.
+    """
+    type: str
+    severity: str
+    message: str
+    line: int
+    suggestion: str
+
+
+class CombinedChecker(ast.NodeVisitor):
+    """
+    Single-pass checker that runs every analysis rule in one traversal.
+
+    Fuses the logical-error, unreachable-code, best-practice and
+    structural checks (plus variable usage tracking) into one walk of
+    the tree instead of one full traversal per rule. Results are
+    collected on instance attributes: `issues`, `suggestions`,
+    `defined_vars` and `used_vars`.
+    """
+
+    issues: list
+    suggestions: list
+    defined_vars: dict
+    used_vars: set
+
+    def __init__(self) -> None:
+        self.issues = []
+        self.suggestions = []
+        # Keys of suggestions already emitted, so N findings of the same
+        # kind produce one suggestion instead of N near-identical entries
+        self._suggestion_keys: set = set()
+        # Map variable name -> set of line numbers where it is defined
+        self.defined_vars = {}
+        self.used_vars = set()
+        # Current block nesting level, maintained as the walk descends
+        self._depth: int = 0
+
+    # Precomputed node-type -> handler table, shared by all instances and
+    # filled in right after the class body. Avoids the 'visit_' + name
+    # string build and getattr lookup that NodeVisitor.visit performs for
+    # every single node, and exact-type lookup beats an isinstance chain.
+    _DISPATCH: ClassVar[dict] = {}
+
+    def visit(self, node: ast.AST) -> None:
+        fn = self._DISPATCH.get(type(node))
+        if fn is not None:
+            return fn(self, node)
+        if isinstance(node, ast.expr):
+            return self._scan_expr(node)
+        self.generic_visit(node)
+
+    def _scan_expr(self, node: ast.expr) -> None:
+        # Expressions cannot contain statements, so none of the block or
+        # function checks apply below this point. The only information an
+        # expression subtree can contribute is variable usage, which a
+        # single set.update over a generator collects in one C-level loop
+        # instead of paying visitor dispatch per child node.
+        self.used_vars.update(
+            n.id for n in _iter_nodes(node)
+            if type(n) is ast.Name and isinstance(n.ctx, ast.Load)
+        )
+
+    def generic_visit(self, node: ast.AST) -> None:
+        # Leaner than NodeVisitor.generic_visit, which goes through
+        # ast.iter_fields and allocates a (name, value) tuple per field.
+        # Iterating _fields directly skips the tuple churn.
+        for name in node._fields:
+            value = getattr(node, name, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.visit(item)
+            elif isinstance(value, ast.AST):
+                self.visit(value)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._check_function(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        # Async functions get the same docstring/length/unreachable checks
+        self._check_function(node)
+
+    def _check_function(self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> None:
+        # Check for functions without docstrings; ast.get_docstring does
+        # the body inspection in one call instead of four chained
+        # isinstance checks (clean=False skips the dedent post-processing)
+        if ast.get_docstring(node, clean=False) is None:
+            # No docstring found
+            if len(node.body) > 3:  # Only flag if function is substantial
+                self.issues.append(Issue(
+                    type=_T_BEST_PRACTICE,
+                    severity=_SEV_INFO,
+                    message=f"Function '{node.name}' doesn't have a docstring.\nDocstrings help explain what your function does.",
+                    line=node.lineno,
+                    suggestion=f"Add a docstring to function '{node.name}' to document its purpose."
+                ))
+
+        # Calculate function length. end_lineno is always populated on
+        # Python 3.8+, so no subtree walk is needed; fall back to the
+        # statement count only if a synthetic tree lacks positions.
+        end_lineno = node.end_lineno
+        if end_lineno:
+            func_lines = end_lineno - node.lineno + 1
+        else:
+            func_lines = len(node.body)
+
+        # Check for long functions
+        if func_lines > MAX_FUNCTION_LINES:
+            self.issues.append(Issue(
+                type=_T_LONG_FUNCTION,
+                severity=_SEV_WARNING,
+                message=f"This function has {func_lines} lines, which is longer than recommended ({MAX_FUNCTION_LINES} lines).\nLong functions are harder to read and understand.",
+                line=node.lineno,
+                suggestion=_S_SPLIT_FUNCTION
+            ))
+            self._add_suggestion('Extract Function', _D_EXTRACT_FUNCTION)
+
+        # Track function parameters as defined variables
+        for arg in node.args.args:
+            self.defined_vars.setdefault(arg.arg, set()).add(node.lineno)
+
+        # Check for unreachable code in the function body
+        self._check_unreachable_in_node(node)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        # Classes get the same docstring expectation as functions; they
+        # previously escaped the check entirely
+        if ast.get_docstring(node, clean=False) is None:
+            if len(node.body) > 3:  # Only flag if class is substantial
+                self.issues.append(Issue(
+                    type=_T_BEST_PRACTICE,
+                    severity=_SEV_INFO,
+                    message=f"Class '{node.name}' doesn't have a docstring.\nDocstrings help explain what your class does.",
+                    line=node.lineno,
+                    suggestion=f"Add a docstring to class '{node.name}' to document its purpose."
+                ))
+        self.generic_visit(node)
+
+    def visit_If(self, node: ast.If) -> None:
+        # Check for always True/False conditions
+        if isinstance(node.test, ast.Constant):
+            if node.test.value is True:
+                self.issues.append(Issue(
+                    type=_T_LOGICAL_ERROR,
+                    severity=_SEV_WARNING,
+                    message=f"Condition on line {node.lineno} is always True.\nThis if statement will always execute, making it unnecessary.",
+                    line=node.lineno,
+                    suggestion=_S_FIX_CONDITION
+                ))
+            elif node.test.value is False:
+                self.issues.append(Issue(
+                    type=_T_LOGICAL_ERROR,
+                    severity=_SEV_WARNING,
+                    message=f"Condition on line {node.lineno} is always False.\nThis if statement will never execute.",
+                    line=node.lineno,
+                    suggestion=_S_FIX_CONDITION
+                ))
+        # Check for comparison with same variable (x == x, x != x)
+        if isinstance(node.test, ast.Compare):
+            if len(node.test.comparators) == 1:
+                left = node.test.left
+                right = node.test.comparators[0]
+                if isinstance(left, ast.Name) and isinstance(right, ast.Name):
+                    if left.id == right.id:
+                        op = type(node.test.ops[0]).__name__
+                        if op in _SELF_CMP_OPS:
+                            self.issues.append(Issue(
+                                type=_T_LOGICAL_ERROR,
+                                severity=_SEV_ERROR,
+                                message=f"Comparing '{left.id}' with itself on line {node.lineno}.\nThis condition is always {'True' if op == 'Eq' else 'False'}.",
+                                line=node.lineno,
+                                suggestion=_S_FIX_SELF_CMP
+                            ))
+        self._enter_block(node)
+        self.generic_visit(node)
+        self._depth -= 1
+
+    def visit_For(self, node: ast.For) -> None:
+        # Check for using range(len(...)) pattern
+        if isinstance(node.iter, ast.Call) and isinstance(node.iter.func, ast.Name):
+            if node.iter.func.id == 'range' and len(node.iter.args) == 1:
+                if isinstance(node.iter.args[0], ast.Call) and \
+                   isinstance(node.iter.args[0].func, ast.Name) and \
+                   node.iter.args[0].func.id == 'len':
+                    self.issues.append(Issue(
+                        type=_T_BEST_PRACTICE,
+                        severity=_SEV_INFO,
+                        message=f"Using 'range(len(...))' on line {node.lineno}.\nConsider using 'enumerate()' or iterating directly over the collection.",
+                        line=node.lineno,
+                        suggestion=_S_USE_ENUMERATE
+                    ))
+        self._enter_block(node)
+        self.generic_visit(node)
+        self._depth -= 1
+
+    def visit_While(self, node: ast.While) -> None:
+        self._enter_block(node)
+        self.generic_visit(node)
+        self._depth -= 1
+
+    def visit_Try(self, node: ast.Try) -> None:
+        self._enter_block(node)
+        self.generic_visit(node)
+        self._depth -= 1
+
+    def visit_With(self, node: ast.With) -> None:
+        # `with` blocks add a nesting level but are never flagged themselves
+        self._depth += 1
+        self.generic_visit(node)
+        self._depth -= 1
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        # Detect variable assignments and remember definition line
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.defined_vars.setdefault(target.id, set()).add(getattr(target, 'lineno', node.lineno))
+            elif isinstance(target, ast.Tuple):
+                # e.g. a, b = ...
+                for elt in target.elts:
+                    if isinstance(elt, ast.Name):
+                        self.defined_vars.setdefault(elt.id, set()).add(getattr(elt, 'lineno', node.lineno))
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        # Detect variable usage
+        if isinstance(node.ctx, ast.Load):
+            self.used_vars.add(node.id)
+
+    def _add_suggestion(self, kind: str, description: str) -> None:
+        key = (kind, description)
+        if key not in self._suggestion_keys:
+            self._suggestion_keys.add(key)
+            self.suggestions.append({'type': kind, 'description': description})
+
+    def _enter_block(self, node: ast.stmt) -> None:
+        # Detect deeply nested structures (if, for, while, try). The depth
+        # counter is maintained as the walk descends, so no subtree has to
+        # be re-scanned to measure how deep it goes. Only the block that
+        # first crosses the threshold is flagged; re-flagging every block
+        # further down the same chain would just repeat the same finding.
+        self._depth += 1
+        if self._depth == MAX_NESTING_DEPTH + 1:
+            self.issues.append(Issue(
+                type=_T_DEEP_NESTING,
+                severity=_SEV_ERROR,
+                message=f"Too many nested levels ({self._depth} levels deep).\nThis makes your code hard to follow and understand.",
+                line=node.lineno,
+                suggestion=_S_REDUCE_NESTING
+            ))
+            self._add_suggestion('Reduce Nesting', _D_REDUCE_NESTING)
+
+    def _check_unreachable_in_node(self, node: ast.AST) -> None:
+        # Check for unreachable code (code after return, break, continue, raise)
+        body = getattr(node, 'body', None)
+        if not isinstance(body, list):
+            return
+
+        for i, stmt in enumerate(body):
+            # Check if this statement makes following code unreachable
+            if type(stmt) in _TERM_TYPES:
+                # Check if there are more statements after this
+                if i < len(body) - 1:
+                    next_stmt = body[i + 1]
+                    if getattr(next_stmt, 'lineno', None) is not None:
+                        self.issues.append(Issue(
+                            type=_T_UNREACHABLE,
+                            severity=_SEV_WARNING,
+                            message=f"Code after line {stmt.lineno} may be unreachable.\nThis code will never execute because of the {type(stmt).__name__.lower()} statement above it.",
+                            line=next_stmt.lineno,
+                            suggestion=_S_REMOVE_UNREACHABLE
+                        ))
+
+
+CombinedChecker._DISPATCH = {
+    ast.FunctionDef: CombinedChecker.visit_FunctionDef,
+    ast.AsyncFunctionDef: CombinedChecker.visit_AsyncFunctionDef,
+    ast.ClassDef: CombinedChecker.visit_ClassDef,
+    ast.If: CombinedChecker.visit_If,
+    ast.For: CombinedChecker.visit_For,
+    ast.While: CombinedChecker.visit_While,
+    ast.Try: CombinedChecker.visit_Try,
+    ast.With: CombinedChecker.visit_With,
+    ast.Assign: CombinedChecker.visit_Assign,
+    ast.Name: CombinedChecker.visit_Name,
+}
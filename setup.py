@@ -0,0 +1,23 @@
+"""
+Optional ahead-of-time build for the hot AST-checker module.
+
+The combined traversal in checkers.py is pure CPU-bound Python. With mypy
+installed, `python setup.py build_ext --inplace` compiles it to a C
+extension via mypyc for roughly 2-5x on the walk; the app imports the
+compiled module transparently when present and falls back to the plain
+Python module otherwise, so this step is never required.
+"""
+
+from setuptools import setup
+
+try:
+    from mypyc.build import mypycify
+    ext_modules = mypycify(['checkers.py'])
+except ImportError:
+    ext_modules = []
+
+setup(
+    name='refactoriq-checkers',
+    version='0.1.0',
+    ext_modules=ext_modules,
+)